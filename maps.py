@@ -1,3 +1,4 @@
+import sys
 from typing import List
 
 from blessed import Terminal
@@ -198,7 +199,8 @@ class Map:
             string += platform.draw()
         for box in self.boxes:
             string += box.draw()
-        print(string, flush=True)
+        sys.stdout.write(string)
+        sys.stdout.flush()
 
     def clear_level(self):
         self.player = 0
@@ -1,18 +1,53 @@
 import logging
 import math
-from typing import Any, List, Tuple
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
 
+import numpy as np
 import pygame
+from numba import njit
+
+if not getattr(pygame, "IS_CE", False):
+    raise ImportError("physics2 relies on the faster Rect operations of pygame-ce, "
+                      "install it with 'pip install pygame-ce'")
 
 logging.basicConfig(filename="logging.txt", filemode="w", level=logging.INFO)
 debug = False  # Set this to True for debugging messages in the log file
-
-COLLISION_TYPES = {"box_to_target": 0,
-                   "object_to_platform": 1,
-                   "player_to_box": 2,
-                   "box_to_box": 3,
-                   "player_to_player": 4,
-                   "object_to_border": 5}
+# The debug logging is guarded with 'if __debug__ and debug:', so running with -O strips it from the bytecode,
+# and every message uses the logger's lazy %-style arguments so nothing gets formatted for a filtered record
+
+# The ids of the collision types (these are also the indices of their handlers in _HANDLERS)
+CT_BOX_TARGET = 0
+CT_OBJECT_PLATFORM = 1
+CT_PLAYER_BOX = 2
+CT_BOX_BOX = 3
+CT_PLAYER_PLAYER = 4
+CT_OBJECT_BORDER = 5
+
+# Kept for backward compatibility, use the CT_* constants instead
+COLLISION_TYPES = {"box_to_target": CT_BOX_TARGET,
+                   "object_to_platform": CT_OBJECT_PLATFORM,
+                   "player_to_box": CT_PLAYER_BOX,
+                   "box_to_box": CT_BOX_BOX,
+                   "player_to_player": CT_PLAYER_PLAYER,
+                   "object_to_border": CT_OBJECT_BORDER}
+
+# The sides of an object, in the order _whatside prefers them
+SIDES = ("top", "bottom", "right", "left")
+
+# Below this many rect pairs collidelistall is cheaper than building the arrays for _overlaps
+# (measured: 9us against 19us for 5 x 4 rects, but 44us against 23us for 10 x 10 rects)
+OVERLAP_MATRIX_MIN_PAIRS = 64
+# Below this many objects testing every pair with colliderect is cheaper than calling _pairwise_overlaps
+# (measured: 4us against 6us for 4 boxes, but 15us against 7us for 8 boxes)
+PAIRWISE_KERNEL_MIN_OBJECTS = 5
+# Below this many objects _pairwise_overlaps is cheaper than the sort-and-sweep broad phase
+# (measured: 370us against 411us for 500 boxes, but 1459us against 889us for 1000 boxes)
+SWEEP_AND_PRUNE_MIN_OBJECTS = 600
+# Below this many platforms collidelistall is cheaper than looking the platforms up in the grid
+# (measured on the levels: 22us against 25us per check with 4 platforms, but 33us against 30us with 6)
+PLATFORM_GRID_MIN_PLATFORMS = 6
+# The number of times the collisions are checked and resolved per step at most, to settle stacked boxes
+MAX_RESOLVE_ITERATIONS = 4
 
 
 class Object(pygame.Rect):
@@ -20,9 +55,12 @@ class Object(pygame.Rect):
     A subclass of pygame.Rect to provide objects for the upscaled simulations inside 'Space'.
     
     This class is not intended to be manually initialized.
+    The pygame.Rect methods returning a new rect (copy, move, ...) skip __init__, so their objects start
+    without a speed (it reads as zero) and without an upscale.
     """
 
-    speed: List[float] = [0, 0]
+    # No per-instance __dict__, which makes the objects smaller and their attributes faster to access
+    __slots__ = ("upscale", "_speed")
 
     def __init__(self, x: int, y: int, w: int, h: int, upscale: int = 1):
         """
@@ -36,6 +74,29 @@ class Object(pygame.Rect):
         """
         super().__init__(x, y, w, h)
         self.upscale = upscale
+        self._speed = np.zeros(2)
+
+    @property
+    def speed(self) -> np.ndarray:
+        """
+        The speed of the object ([horizontal, vertical], pixels/seconds).
+
+        For the players and boxes of a 'Space' this is a view into the velocity array of the space.
+        """
+        try:
+            return self._speed
+        except AttributeError:
+            # Made by a pygame.Rect method, which didn't call __init__
+            self._speed = np.zeros(2)
+            return self._speed
+
+    @speed.setter
+    def speed(self, value: Sequence[float]) -> None:
+        # Written in place, so the view into the velocity array of the space is kept
+        try:
+            self._speed[:] = value
+        except AttributeError:
+            self._speed = np.array(value, dtype=float)
 
     def get_position(self) -> Tuple[int, int]:
         """
@@ -49,6 +110,116 @@ class Object(pygame.Rect):
         return round(x), round(y)
 
 
+def _aabb(rects: List[Object]) -> np.ndarray:
+    """
+    Packs the edges of the given rects into an array.
+
+    :param rects: The rects to be packed.
+    :return: An array of shape (N, 4), where each row holds the left, top, right and bottom edge of a rect.
+    """
+    edges = (edge for rect in rects for edge in (rect.left, rect.top, rect.right, rect.bottom))
+    return np.fromiter(edges, dtype=np.int32, count=len(rects) * 4).reshape(-1, 4)
+
+
+def _overlaps(aabb1: np.ndarray, aabb2: np.ndarray) -> np.ndarray:
+    """
+    Tests every rect of aabb1 against every rect of aabb2.
+
+    This matches pygame.Rect.colliderect for rects with non-negative sizes, so rects with no width or height
+    don't overlap anything.
+
+    :param aabb1: An (N, 4) array made by _aabb.
+    :param aabb2: An (M, 4) array made by _aabb.
+    :return: An (N, M) boolean array, where [i, j] is True if the i-th rect of aabb1 overlaps the j-th rect of aabb2.
+    """
+    left1, top1, right1, bottom1 = aabb1.T
+    left2, top2, right2, bottom2 = aabb2.T
+    nonempty1 = (left1 != right1) & (top1 != bottom1)
+    nonempty2 = (left2 != right2) & (top2 != bottom2)
+    return ((left1[:, None] < right2) & (right1[:, None] > left2)
+            & (top1[:, None] < bottom2) & (bottom1[:, None] > top2)
+            & nonempty1[:, None] & nonempty2)
+
+
+def _collisions_between(rects1: List[Object], rects2: List[Object]) -> List[List[int]]:
+    """
+    Finds the rects of rects2 colliding with each rect of rects1.
+
+    :param rects1: The rects to be tested.
+    :param rects2: The rects they are tested against.
+    :return: A list holding the sorted indices of the colliding rects of rects2 for every rect of rects1.
+    """
+    if len(rects1) * len(rects2) < OVERLAP_MATRIX_MIN_PAIRS:
+        return [rect.collidelistall(rects2) for rect in rects1]
+
+    hits = [[] for _ in rects1]
+    rows, columns = np.nonzero(_overlaps(_aabb(rects1), _aabb(rects2)))
+    for i, j in zip(rows.tolist(), columns.tolist()):
+        hits[i].append(j)
+    return hits
+
+
+@njit(cache=True)
+def _pairwise_overlaps(aabb: np.ndarray, out_i: np.ndarray, out_j: np.ndarray) -> int:
+    """
+    Tests every pair of rects in aabb against each other (compiled, so no N x N temporary is needed).
+
+    :param aabb: An (N, 4) array made by _aabb.
+    :param out_i: The array the first indices of the overlapping pairs are written to (at least N * (N - 1) / 2 long).
+    :param out_j: The array the second indices of the overlapping pairs are written to (at least N * (N - 1) / 2 long).
+    :return: The number of overlapping pairs written to out_i and out_j, in the order of the brute-force test.
+    """
+    n = aabb.shape[0]
+    k = 0
+    for i in range(n):
+        # Like colliderect, rects with no width or height don't collide with anything
+        if aabb[i, 0] == aabb[i, 2] or aabb[i, 1] == aabb[i, 3]:
+            continue
+        for j in range(i + 1, n):
+            if (aabb[i, 0] < aabb[j, 2] and aabb[i, 2] > aabb[j, 0]
+                    and aabb[i, 1] < aabb[j, 3] and aabb[i, 3] > aabb[j, 1]
+                    and aabb[j, 0] != aabb[j, 2] and aabb[j, 1] != aabb[j, 3]):
+                out_i[k] = i
+                out_j[k] = j
+                k += 1
+    return k
+
+
+def _whatside(item1: Object, item2: Object) -> str:
+    """
+    Finds out which side of item1 collides with item2.
+
+    :param item1: The object whose side is looked for.
+    :param item2: The object item1 collides with.
+    :return: The side of item1 that is the least pushed into item2 (on ties the first one of SIDES).
+    """
+    distances = (abs(item1.top - item2.bottom), abs(item1.bottom - item2.top),
+                 abs(item1.right - item2.left), abs(item1.left - item2.right))
+    return SIDES[distances.index(min(distances))]
+
+
+def _sweep_and_prune(rects: List[Object]) -> List[Tuple[int, int]]:
+    """
+    Finds the overlapping pairs in a list of rects with a sort-and-sweep along the x axis.
+
+    :param rects: The rects to be tested against each other.
+    :return: A sorted list of (i, j) index pairs with i < j, for every overlapping pair of rects.
+    """
+    pairs = []
+    active = []
+    for i, rect in sorted(enumerate(rects), key=lambda item: item[1].left):
+        # Rects that end before this one starts can't overlap with it or any of the following ones
+        active = [j for j in active if rects[j].right > rect.left]
+        for j in active:
+            if rect.colliderect(rects[j]):
+                pairs.append((min(i, j), max(i, j)))
+        active.append(i)
+
+    # Keeping the order of the brute-force test, so the collisions are resolved in the same order
+    pairs.sort()
+    return pairs
+
+
 class Space:
     """
     This class is representing a 2D space.
@@ -56,15 +227,6 @@ class Space:
     This class handles all the object creation, collision handling and event detecting.
     """
 
-    targets: List[Object] = []
-    targets_engaged: int = 0
-    players: List[Object] = []
-    boxes: List[Object] = []
-    platforms: List[Object] = []
-    thinkingbox: Object = None
-    player_on_ground = False
-    player_in_thinkingbox = False
-
     def __init__(self, w: int, h: int, gravity: int, upscale: int = 100):
         """
         Initialization.
@@ -79,6 +241,45 @@ class Space:
         self.gravity = gravity * upscale
         self.upscale = upscale
 
+        # Every space owns its lists, class-level lists would be shared by all the spaces
+        self.targets: List[Object] = []
+        self.targets_engaged = 0
+        self.players: List[Object] = []
+        self.boxes: List[Object] = []
+        self.platforms: List[Object] = []
+        self.thinkingbox: Object = None
+        self.player_on_ground = False
+        self.player_in_thinkingbox = False
+        # The horizontal position of the first player, set by resolve_collisions for _resolve_box_to_box
+        self._player_x = 0
+
+        jump_height = 7 * self.upscale
+        self._jump_speed = self.gravity * math.sqrt((jump_height / self.gravity) * 2)
+
+        # Per-frame values derived from the fps, refreshed by step only when the fps changes
+        self._cached_fps = None
+        self._g_per_frame = 0.0
+        self._inv_fps = 0.0
+
+        # The dynamic objects (players first, then boxes) and their speeds, rebuilt by step after objects are added
+        self._dynamic_objects: List[Object] = []
+        self._dynamic_dirty = True
+        self._dyn_vel = np.zeros((0, 2))
+        # Scratch arrays of step's integration, sized together with the velocity array
+        self._dyn_step = np.zeros((0, 2))
+        self._dyn_pos = np.zeros((0, 2))
+        self._dyn_rounded = np.zeros((0, 2), dtype=np.int32)
+        # Whether anything moved since the collisions last settled (when not, step skips checking them)
+        self._any_motion = True
+
+        # Output buffers of _pairwise_overlaps, grown when a list gets longer than they can hold
+        self._pair_i = np.empty(0, dtype=np.int64)
+        self._pair_j = np.empty(0, dtype=np.int64)
+
+        # The platforms never move, so they are put into a uniform grid once, when they are added
+        self._cell_size = 4 * upscale
+        self._platform_grid: Dict[Tuple[int, int], List[int]] = {}
+
     def add_object(self, x: int, y: int, w: int, h: int, type: str) -> Object:
         """
         Adds a physical object to the space at the given position.
@@ -99,12 +300,61 @@ class Space:
         if type == "box":
             self.boxes.append(item)
         if type == "platform":
+            for cell in self._cells(item):
+                self._platform_grid.setdefault(cell, []).append(len(self.platforms))
             self.platforms.append(item)
         if type == "thinkingbox":
             self.thinkingbox = item
 
+        if type in ("player", "box"):
+            self._dynamic_dirty = True
+            if max(len(self.players), len(self.boxes)) == PAIRWISE_KERNEL_MIN_OBJECTS:
+                # Compiling the kernel while the level is built, so the first step of the game doesn't stall on it
+                _pairwise_overlaps(np.zeros((0, 4), dtype=np.int32), self._pair_i, self._pair_j)
+        self._any_motion = True
+
         return item
 
+    def _bind_velocities(self) -> None:
+        # Packs the speeds of the dynamic objects into one array and points each object's speed at its own row
+        self._dynamic_objects = self.players + self.boxes
+        velocities = np.zeros((len(self._dynamic_objects), 2))
+        for i, item in enumerate(self._dynamic_objects):
+            velocities[i] = item.speed
+            item._speed = velocities[i]
+        self._dyn_vel = velocities
+        self._dyn_step = np.empty_like(velocities)
+        self._dyn_pos = np.empty_like(velocities)
+        self._dyn_rounded = np.empty(velocities.shape, dtype=np.int32)
+        self._dynamic_dirty = False
+
+    def _cells(self, item: Object) -> Iterator[Tuple[int, int]]:
+        # Yields the grid cells covered by item
+        size = self._cell_size
+        for cell_x in range(item.left // size, (item.right - 1) // size + 1):
+            for cell_y in range(item.top // size, (item.bottom - 1) // size + 1):
+                yield cell_x, cell_y
+
+    def _platforms_hit(self, item: Object) -> List[int]:
+        # Gets the sorted indices of the platforms colliding with item, testing only the ones in item's cells
+        platforms = self.platforms
+        if len(platforms) < PLATFORM_GRID_MIN_PLATFORMS:
+            return item.collidelistall(platforms)
+
+        grid = self._platform_grid
+        size = self._cell_size
+        cell_x, cell_y = item.left // size, item.top // size
+        if cell_x == (item.right - 1) // size and cell_y == (item.bottom - 1) // size:
+            # Covering a single cell, whose indices are already sorted and unique
+            return [i for i in grid.get((cell_x, cell_y), ()) if item.colliderect(platforms[i])]
+
+        seen = set()
+        for cell in self._cells(item):
+            platforms_i = grid.get(cell)
+            if platforms_i:
+                seen.update(platforms_i)
+        return sorted(i for i in seen if item.colliderect(platforms[i]))
+
     def check_collisions(self) -> List[Tuple[Object, Any, int]]:
         """
         This method checks for collisions between objects and lists them all.
@@ -112,200 +362,214 @@ class Space:
         :return: A list of tuples that contain information about the collisions in the following form: (item1, item2(can be 'wall'), id of collision type).
         """
         collisions = []
+        collisions_append = collisions.append
+        collisions_extend = collisions.extend
 
-        def check_list(item1: Object, rect_list: List[Object], collision_type: str) -> None:
-            # Adds the collisions of item1 with the items in rect_list to the collisions list
-            item1toitem2_list = item1.collidelistall(rect_list)
-            if item1toitem2_list:
-                for i in item1toitem2_list:
-                    item2 = rect_list[i]
-                    collisions.append((item1, item2, COLLISION_TYPES[collision_type]))
-
-                    if debug:
-                        logging.info(f"{item1} collides with {item2} ({collision_type})")
+        def check_list(item1: Object, ids: List[int], rect_list: List[Object], collision_type: int) -> None:
+            # Adds the collisions of item1 with the items of rect_list at the given indices to the collisions list
+            if ids:
+                collisions_extend([(item1, rect_list[i], collision_type) for i in ids])
 
         def check_borders(item: Object) -> None:
             # Adds the collisions of item1 with the borders to the collisions list
             if item.left < 0 or item.right > self.w or item.top < 0 or item.bottom > self.h:
-                collisions.append((item, "wall", COLLISION_TYPES["object_to_border"]))
-
-                if debug:
-                    logging.info(f"{item} collides with a border")
+                collisions_append((item, "wall", CT_OBJECT_BORDER))
 
-        def check_sametype(itemlist: List[Object], collision_type: str) -> None:
+        def check_sametype(itemlist: List[Object], collision_type: int) -> None:
             # Adds the collisions between objects in a list to the collisions list
-            for item1_i, item1 in enumerate(itemlist):
-                for item2_i in range(len(itemlist) - (item1_i + 1)):
-                    item2_i += (item1_i + 1)
-                    item2 = itemlist[item2_i]
-                    if item1.colliderect(item2):
-                        collisions.append((item1, item2, COLLISION_TYPES[collision_type]))
-
-                        if debug:
-                            logging.info(f"{item1}, array index: {item1_i},\
-                                      collides with a similar object ({collision_type})")
-
-        def check_playerinthinking() -> None:
-            # Checks whether any player is inside the thinking-box
-            if (player.left > self.thinkingbox.left and player.right < self.thinkingbox.right
-                    and abs(player.bottom - self.thinkingbox.bottom) < 2 and abs(player.top - self.thinkingbox.top) < 2):
-                self.player_in_thinkingbox = True
+            count = len(itemlist)
+            if count < PAIRWISE_KERNEL_MIN_OBJECTS:
+                pairs = [(item1_i, item2_i) for item1_i in range(count) for item2_i in range(item1_i + 1, count)
+                         if itemlist[item1_i].colliderect(itemlist[item2_i])]
+            elif count < SWEEP_AND_PRUNE_MIN_OBJECTS:
+                max_pairs = count * (count - 1) // 2
+                if self._pair_i.size < max_pairs:
+                    self._pair_i = np.empty(max_pairs, dtype=np.int64)
+                    self._pair_j = np.empty(max_pairs, dtype=np.int64)
+                found = _pairwise_overlaps(_aabb(itemlist), self._pair_i, self._pair_j)
+                pairs = list(zip(self._pair_i[:found].tolist(), self._pair_j[:found].tolist()))
+            else:
+                pairs = _sweep_and_prune(itemlist)
+            collisions_extend([(itemlist[item1_i], itemlist[item2_i], collision_type) for item1_i, item2_i in pairs])
 
         # Collision checking is only needed for the moving objects (in this case these are boxes and players)
-        for box in self.boxes:
-            if debug:
-                index = 0
-                logging.info(f"checking box{index}'s collisions")
-                index += 1
-
-            check_list(box, self.targets, "box_to_target")
-            check_list(box, self.platforms, "object_to_platform")
+        for box, targets_hit in zip(self.boxes, _collisions_between(self.boxes, self.targets)):
+            check_list(box, targets_hit, self.targets, CT_BOX_TARGET)
+            check_list(box, self._platforms_hit(box), self.platforms, CT_OBJECT_PLATFORM)
             check_borders(box)
-        check_sametype(self.boxes, "box_to_box")
+        check_sametype(self.boxes, CT_BOX_BOX)
 
-        for player in self.players:
-            if debug:
-                logging.info("checking player collisions")
-
-            check_list(player, self.platforms, "object_to_platform")
-            check_list(player, self.boxes, "player_to_box")
+        for player, boxes_hit in zip(self.players, _collisions_between(self.players, self.boxes)):
+            check_list(player, self._platforms_hit(player), self.platforms, CT_OBJECT_PLATFORM)
+            check_list(player, boxes_hit, self.boxes, CT_PLAYER_BOX)
             check_borders(player)
-            if self.thinkingbox:
-                check_playerinthinking(player)
-        check_sametype(self.players, "player_to_player")
+        if self.thinkingbox:
+            # Checks whether any player is inside the thinking-box (one is enough)
+            tb_left, tb_right = self.thinkingbox.left, self.thinkingbox.right
+            tb_top, tb_bottom = self.thinkingbox.top, self.thinkingbox.bottom
+            for player in self.players:
+                if (player.left > tb_left and player.right < tb_right
+                        and abs(player.bottom - tb_bottom) < 2 and abs(player.top - tb_top) < 2):
+                    self.player_in_thinkingbox = True
+                    break
+        check_sametype(self.players, CT_PLAYER_PLAYER)
+
+        if __debug__ and debug:
+            for collision in collisions:
+                logging.info("%s collides with %s (%s)", collision[0], collision[1], collision[2])
 
         return collisions
 
-    def resolve_collisions(self, collisions: List[Tuple[Object, Any, int]]) -> None:
+    def resolve_collisions(self, collisions: List[Tuple[Object, Any, int]]) -> bool:
         """
         Resolves all the collisions.
 
         :param collisions: The list of collisions to be resolved (this should be a product of the check_collisions method)
-        :return: None
+        :return: Whether resolving the collisions changed the position or the speed of any object.
         """
-        def whatside(collision: Tuple[Object, Object, int], tolerance: int = 31) -> str:
-            if abs(collision[0].top - collision[1].bottom) < tolerance:
-                return "top"
-            if abs(collision[0].bottom - collision[1].top) < tolerance:
-                return "bottom"
-            if abs(collision[0].right - collision[1].left) < tolerance:
-                return "right"
-            if abs(collision[0].left - collision[1].right) < tolerance:
-                return "left"
-
-        for collision in collisions:
-            item1 = collision[0]
-            item2 = collision[1]
-            collision_type = collision[2]
-
-            if debug:
-                index = 0
+        # The player doesn't move while the collisions are resolved, so its position is only looked up once
+        self._player_x = self.players[0].left if self.players else 0
+
+        moved = False
+        handlers = _HANDLERS
+        for index, collision in enumerate(collisions):
+            item1, item2, collision_type = collision
+
+            if __debug__ and debug and logging.getLogger().isEnabledFor(logging.INFO):
                 if item2 != "wall":
-                    logging.info(f"resolving collision{index}, {collision}: \n"
-                                 f"\t item1 stats: topleft: {item1.topleft}, speed: {item1.speed} \n"
-                                 f"\t item2 stats: topleft: {item2.topleft}, speed: {item2.speed}")
+                    logging.info("resolving collision%s, %s: \n"
+                                 "\t item1 stats: topleft: %s, speed: %s \n"
+                                 "\t item2 stats: topleft: %s, speed: %s",
+                                 index, collision, item1.topleft, item1.speed, item2.topleft, item2.speed)
                 else:
-                    logging.info(f"resolving collision{index}, {collision}: \n"
-                                 f"\t item1 stats: topleft: {item1.topleft}, speed: {item1.speed}")
-
-            if collision_type == COLLISION_TYPES["box_to_target"]:
-                self.targets_engaged += 1
-
-            if collision_type == COLLISION_TYPES["object_to_platform"]:
-                side = whatside(collision)
-                if debug:
-                    logging.info(f"collision happened at item1's {side} side")
-                if side == "left":
-                    item1.speed[0] = 0
-                    item1.left = item2.right
-                if side == "right":
-                    item1.speed[0] = 0
-                    item1.right = item2.left
-                if side == "top":
-                    item1.speed = [item1.speed[0], item1.speed[1]*-1]
-                    item1.top = item2.bottom
-                if side == "bottom":
-                    item1.speed = [0, 0]
-                    item1.bottom = item2.top
-                    if item1 in self.players:
-                        self.player_on_ground = True
-
-            if collision_type == COLLISION_TYPES["player_to_box"]:
-                side = whatside(collision)
-                if debug:
-                    logging.info(f"collision happened at item1's {side} side")
-                if side == "top":
-                    item2.speed = [0, 0]
-                    item2.bottom = item1.top
-                if side == "bottom":
-                    item1.speed = [0, 0]
-                    item1.bottom = item2.top
-                    self.player_on_ground = True
-                if side == "left":
-                    item2.speed = [0, item2.speed[1]]
-                    item2.right = item1.left
-                if side == "right":
-                    item2.speed = [0, item2.speed[1]]
-                    item2.left = item1.right
-
-            if collision_type == COLLISION_TYPES["box_to_box"]:
-                # Finding out which box is moved by the player, so that it will be the dominant object in the collision
-                item1_dist = abs(self.players[0].topleft[0] - item1.topleft[0])
-                item2_dist = abs(self.players[0].topleft[0] - item2.topleft[0])
-                alpha_box = item1
-                if item1_dist > item2_dist:
-                    alpha_box = item2
-
-                side = whatside(collision)
-                if debug:
-                    logging.info(f"collision happened at item1's {side} side")
-                if side == "top":
-                    item2.speed = [0, 0]
-                    item2.bottom = item1.top
-                if side == "bottom":
-                    item1.speed = [0, 0]
-                    item1.bottom = item2.top
-                if side == "left":
-                    item1.speed[0] = 0
-                    item2.speed[0] = 0
-                    if alpha_box is item1:
-                        item2.right = item1.left
-                    else:
-                        item1.left = item2.right
-                if side == "right":
-                    item1.speed[0] = 0
-                    item2.speed[0] = 0
-                    if alpha_box is item1:
-                        item2.left = item1.right
-                    else:
-                        item1.right = item2.left
-
-            if collision_type == COLLISION_TYPES["player_to_player"]:
-                pass
-
-            if collision_type == COLLISION_TYPES["object_to_border"]:
-                if item1.left < 0:
-                    item1.speed[0] = 0
-                    item1.left = 0
-                if item1.right > self.w:
-                    item1.speed[0] = 0
-                    item1.right = self.w
-                if item1.top < 0:
-                    item1.speed[1] *= -1
-                    item1.top = 0
-                if item1.bottom > self.h:
-                    item1.speed[1] *= 0
-                    item1.bottom = self.h
-
-            if debug:
+                    logging.info("resolving collision%s, %s: \n"
+                                 "\t item1 stats: topleft: %s, speed: %s",
+                                 index, collision, item1.topleft, item1.speed)
+
+            if handlers[collision_type](self, item1, item2):
+                moved = True
+
+            if __debug__ and debug and logging.getLogger().isEnabledFor(logging.INFO):
                 if item2 != "wall":
-                    logging.info(f"resolved collision{index}, {collision}: \n"
-                                 f"\t item1 stats: topleft: {item1.topleft}, speed: {item1.speed} \n"
-                                 f"\t item2 stats: topleft: {item2.topleft}, speed: {item2.speed}")
+                    logging.info("resolved collision%s, %s: \n"
+                                 "\t item1 stats: topleft: %s, speed: %s \n"
+                                 "\t item2 stats: topleft: %s, speed: %s",
+                                 index, collision, item1.topleft, item1.speed, item2.topleft, item2.speed)
                 else:
-                    logging.info(f"resolved collision{index}, {collision}: \n"
-                                 f"\t item1 stats: topleft: {item1.topleft}, speed: {item1.speed} \n")
-                index += 1
+                    logging.info("resolved collision%s, %s: \n"
+                                 "\t item1 stats: topleft: %s, speed: %s \n",
+                                 index, collision, item1.topleft, item1.speed)
+
+        return moved
+
+    # The handlers of resolve_collisions, one for each collision type (see _HANDLERS).
+    # Each of them returns whether it changed the position or the speed of any object.
+    # whatside always finds a side, so the side-based handlers always move something.
+
+    def _resolve_box_to_target(self, item1: Object, item2: Object) -> bool:
+        self.targets_engaged += 1
+        return False
+
+    def _resolve_object_to_platform(self, item1: Object, item2: Object) -> bool:
+        side = _whatside(item1, item2)
+        if __debug__ and debug:
+            logging.info("collision happened at item1's %s side", side)
+        if side == "left":
+            item1.speed[0] = 0
+            item1.left = item2.right
+        if side == "right":
+            item1.speed[0] = 0
+            item1.right = item2.left
+        if side == "top":
+            item1.speed[1] = -item1.speed[1]
+            item1.top = item2.bottom
+        if side == "bottom":
+            item1.speed[0] = 0
+            item1.speed[1] = 0
+            item1.bottom = item2.top
+            if item1 in self.players:
+                self.player_on_ground = True
+        return True
+
+    def _resolve_player_to_box(self, item1: Object, item2: Object) -> bool:
+        side = _whatside(item1, item2)
+        if __debug__ and debug:
+            logging.info("collision happened at item1's %s side", side)
+        if side == "top":
+            item2.speed[0] = 0
+            item2.speed[1] = 0
+            item2.bottom = item1.top
+        if side == "bottom":
+            item1.speed[0] = 0
+            item1.speed[1] = 0
+            item1.bottom = item2.top
+            self.player_on_ground = True
+        if side == "left":
+            item2.speed[0] = 0
+            item2.right = item1.left
+        if side == "right":
+            item2.speed[0] = 0
+            item2.left = item1.right
+        return True
+
+    def _resolve_box_to_box(self, item1: Object, item2: Object) -> bool:
+        # Finding out which box is moved by the player, so that it will be the dominant object in the collision
+        player_x = self._player_x
+        item1_dist = abs(player_x - item1.left)
+        item2_dist = abs(player_x - item2.left)
+        alpha_box = item1
+        if item1_dist > item2_dist:
+            alpha_box = item2
+
+        side = _whatside(item1, item2)
+        if __debug__ and debug:
+            logging.info("collision happened at item1's %s side", side)
+        if side == "top":
+            item2.speed[0] = 0
+            item2.speed[1] = 0
+            item2.bottom = item1.top
+        if side == "bottom":
+            item1.speed[0] = 0
+            item1.speed[1] = 0
+            item1.bottom = item2.top
+        if side == "left":
+            item1.speed[0] = 0
+            item2.speed[0] = 0
+            if alpha_box is item1:
+                item2.right = item1.left
+            else:
+                item1.left = item2.right
+        if side == "right":
+            item1.speed[0] = 0
+            item2.speed[0] = 0
+            if alpha_box is item1:
+                item2.left = item1.right
+            else:
+                item1.right = item2.left
+        return True
+
+    def _resolve_player_to_player(self, item1: Object, item2: Object) -> bool:
+        return False
+
+    def _resolve_object_to_border(self, item1: Object, item2: str) -> bool:
+        moved = False
+        if item1.left < 0:
+            moved = True
+            item1.speed[0] = 0
+            item1.left = 0
+        if item1.right > self.w:
+            moved = True
+            item1.speed[0] = 0
+            item1.right = self.w
+        if item1.top < 0:
+            moved = True
+            item1.speed[1] *= -1
+            item1.top = 0
+        if item1.bottom > self.h:
+            moved = True
+            item1.speed[1] *= 0
+            item1.bottom = self.h
+        return moved
 
     def move_player(self, player: Object, key: str) -> None:
         """
@@ -315,25 +579,25 @@ class Space:
         :param key: The direction of the movement; can be: "up", "down", "left", "right".
         :return: None
         """
-        jump_height = 7 * self.upscale
-        jump_speed = self.gravity * math.sqrt((jump_height / self.gravity) * 2)
+        self._any_motion = True
+        jump_speed = self._jump_speed
         if key == "up" and self.player_on_ground:
-            logging.info(f"moving player up: speed: {player.speed}")
+            logging.info("moving player up: speed: %s", player.speed)
             player.speed[1] = jump_speed * -1
             self.player_on_ground = False
-            logging.info(f"moved player up: speed: {player.speed}")
+            logging.info("moved player up: speed: %s", player.speed)
         if key == "down":
-            logging.info(f"moving player down: speed: {player.speed}")
+            logging.info("moving player down: speed: %s", player.speed)
             player.speed[1] += jump_speed
-            logging.info(f"moving player down: speed: {player.speed}")
+            logging.info("moving player down: speed: %s", player.speed)
 
         # TODO: Find a way to automatically determine the right movement speed for the sides based on the upscale
         if key == "right":
             player.right += 30
-            logging.info(f"moved player right: topleft: {player.topleft}")
+            logging.info("moved player right: topleft: %s", player.topleft)
         if key == "left":
             player.left -= 30
-            logging.info(f"moved player left: topleft: {player.topleft}")
+            logging.info("moved player left: topleft: %s", player.topleft)
 
     def step(self, fps: int) -> None:
         """
@@ -342,38 +606,49 @@ class Space:
         :param fps: The number of times the main loop is executed per second.
         :return: None
         """
-        self.player_in_thinkingbox = False
-
-        # This is to make sure no boxes remain pushed into each other after the step
-        for i in range(len(self.boxes)):
-            self.targets_engaged = 0
-            collisions = self.check_collisions()
-            self.resolve_collisions(collisions)
-
-        dynamic_objects = self.players + self.boxes
+        if fps != self._cached_fps:
+            self._g_per_frame = self.gravity / fps
+            self._inv_fps = 1.0 / fps
+            self._cached_fps = fps
+        if self._dynamic_dirty:
+            self._bind_velocities()
+
+        # When nothing moved since the collisions settled, checking them again would find the same (harmless) ones
+        settled = True
+        if self._any_motion:
+            self.player_in_thinkingbox = False
+
+            # This is to make sure no boxes remain pushed into each other after the step
+            settled = False
+            for _ in range(MAX_RESOLVE_ITERATIONS):
+                self.targets_engaged = 0
+                collisions = self.check_collisions()
+                if not collisions or not self.resolve_collisions(collisions):
+                    settled = True
+                    break
+
+        dynamic_objects = self._dynamic_objects
         # applying gravity to dynamic objects
-        for object in dynamic_objects:
-            if debug:
-                index = 0
-                logging.info(f"applying gravity on object{index}: speed: {object.speed}")
-            object.speed[1] += (self.gravity / fps)
-            if debug:
-                logging.info(f"applied gravity on object{index}: speed: {object.speed}")
-                index += 1
-
-        # moving objects
-        for object in dynamic_objects:
-            if debug:
-                index = 0
-                logging.info(f"moving dynamic_object{index}: topleft: {object.topleft}")
-
-            new_x = round(object.topleft[0] + object.speed[0] * (1 / fps))
-            new_y = round(object.topleft[1] + object.speed[1] * (1 / fps))
+        self._dyn_vel[:, 1] += self._g_per_frame
+
+        # moving objects (the rects are read back, since they are moved by the collision resolving too)
+        coords = (coord for object in dynamic_objects for coord in object.topleft)
+        start = np.fromiter(coords, dtype=np.float64, count=len(dynamic_objects) * 2).reshape(-1, 2)
+        # Written into the preallocated arrays, so no temporaries are made
+        positions = self._dyn_pos
+        np.multiply(self._dyn_vel, self._inv_fps, out=self._dyn_step)
+        np.add(start, self._dyn_step, out=positions)
+        np.rint(positions, out=positions)
+        self._any_motion = not settled or not np.array_equal(positions, start)
+        rounded = self._dyn_rounded
+        np.copyto(rounded, positions, casting="unsafe")
+
+        for object, (new_x, new_y) in zip(dynamic_objects, rounded.tolist()):
             object.topleft = new_x, new_y
 
-            if debug:
-                logging.info(f"moved dynamic_object{index}: topleft: {object.topleft}")
-                index += 1
+        if __debug__ and debug:
+            for index, object in enumerate(dynamic_objects):
+                logging.info("moved dynamic_object%s: topleft: %s, speed: %s", index, object.topleft, object.speed)
 
     def reset(self) -> None:
         """Resets the whole space for reuse."""
@@ -382,6 +657,20 @@ class Space:
         self.players = []
         self.boxes = []
         self.platforms = []
+        self._platform_grid = {}
         self.thinkingbox = None
         self.player_on_ground = False
         self.player_in_thinkingbox = False
+        self._dynamic_objects = []
+        self._dynamic_dirty = True
+        self._dyn_vel = np.zeros((0, 2))
+        self._any_motion = True
+
+
+# The resolve_collisions handlers, indexed by the collision type ids
+_HANDLERS = (Space._resolve_box_to_target,
+             Space._resolve_object_to_platform,
+             Space._resolve_player_to_box,
+             Space._resolve_box_to_box,
+             Space._resolve_player_to_player,
+             Space._resolve_object_to_border)
@@ -1,21 +1,92 @@
+from functools import lru_cache
+from types import SimpleNamespace
+
+
+@lru_cache(maxsize=None)
+def _palette(terminal):  # Builds the colored characters of the sprites, once for every terminal
+    return SimpleNamespace(
+        player_eye_left=terminal.white(terminal.on_blue('▘')),
+        player_eye_right=terminal.white(terminal.on_blue('▝')),
+        player_body=terminal.blue(terminal.on_blue(' ')),
+        player_top_left=terminal.blue(terminal.on_midnightblue('▟')),
+        player_top_right=terminal.blue(terminal.on_midnightblue('▙')),
+        player_leg_left=terminal.blue(terminal.on_midnightblue('▞')),
+        player_leg_right=terminal.blue(terminal.on_midnightblue('▚')),
+        player_leg_middle=terminal.blue(terminal.on_midnightblue('▍')),
+        player_eye_left_inside=terminal.white(terminal.on_gray15('▘')),
+        player_eye_right_inside=terminal.white(terminal.on_gray15('▝')),
+        box_top_left=terminal.navajowhite4(terminal.on_navajowhite3('▛')),
+        box_top=terminal.navajowhite4(terminal.on_navajowhite3('▔')),
+        box_top_right=terminal.navajowhite4(terminal.on_navajowhite3('▜')),
+        box_bottom_left=terminal.navajowhite4(terminal.on_navajowhite3('▙')),
+        box_bottom=terminal.navajowhite4(terminal.on_navajowhite3('▁')),
+        box_bottom_right=terminal.navajowhite4(terminal.on_navajowhite3('▟')),
+        target_top_left=terminal.gray38(terminal.on_midnightblue('▛')),
+        target_top=terminal.gray38(terminal.on_midnightblue('▔')),
+        target_top_right=terminal.gray38(terminal.on_midnightblue('▜')),
+        target_bottom_left=terminal.gray38(terminal.on_midnightblue('▙')),
+        target_bottom=terminal.gray38(terminal.on_midnightblue('▁')),
+        target_bottom_right=terminal.gray38(terminal.on_midnightblue('▟')),
+        platform_left=terminal.orchid4(terminal.on_plum4('▛')),
+        platform_middle=terminal.orchid4(terminal.on_plum4('▔')),
+        platform_right=terminal.orchid4(terminal.on_plum4('▜')),
+        platform_vertical=terminal.orchid4(terminal.on_plum4('▚')),
+        thinkingbox_top_left=terminal.gray37(terminal.on_gray15('▛')),
+        thinkingbox_top=terminal.gray37(terminal.on_gray15('▔')),
+        thinkingbox_top_right=terminal.gray37(terminal.on_gray15('▜')),
+        thinkingbox_left=terminal.gray37(terminal.on_gray15('▏')),
+        thinkingbox_inside=terminal.gray37(terminal.on_gray15(' ')),
+        thinkingbox_right=terminal.gray37(terminal.on_gray15('▕'))
+    )
+
+
 class Drawable:
 
     def __init__(self):
-        self.parts = []
+        self.blob = ""  # every part of the body joined together, drawing just returns this string
 
     def draw(self):
-        wholePart = ""
-        for part in self.parts:
-            wholePart+=part
-        return wholePart
+        return self.blob
+
+
+@lru_cache(maxsize=None)
+def _player_body(terminal, x, y):  # Builds the body of the player at (x, y)
+    palette = _palette(terminal)
+    parts = []
+    eye1 = terminal.move_xy(x + 1, y + 1) + palette.player_eye_left
+    parts.append(eye1)
+    eye2 = terminal.move_xy(x + 2, y + 1) + palette.player_eye_right
+    parts.append(eye2)
+    left = terminal.move_xy(x, y + 1) + palette.player_body
+    parts.append(left)
+    right = terminal.move_xy(x + 3, y + 1) + palette.player_body
+    parts.append(right)
+    up1 = terminal.move_xy(x, y) + palette.player_top_left
+    parts.append(up1)
+    up2 = terminal.move_xy(x + 1, y) + palette.player_body
+    parts.append(up2)
+    up3 = terminal.move_xy(x + 2, y) + palette.player_body
+    parts.append(up3)
+    up4 = terminal.move_xy(x + 3, y) + palette.player_top_right
+    parts.append(up4)
+    leg1 = terminal.move_xy(x, y + 2) + palette.player_leg_left
+    parts.append(leg1)
+    leg4 = terminal.move_xy(x + 3, y + 2) + palette.player_leg_right
+    parts.append(leg4)
+    leg2 = terminal.move_xy(x + 1, y + 2) + palette.player_leg_middle
+    parts.append(leg2)
+    leg3 = terminal.move_xy(x + 2, y + 2) + palette.player_leg_middle
+    parts.append(leg3)
+    return ''.join(parts)
+
 
-    
 class Player(Drawable):
 
     """
         Every draw, create_body and delete function works the same.
-        Draw function prints everything in parts list.
-        Create body puts every character at the needed position and puts them in parts list.
+        Draw function returns the whole body as one string.
+        Create body puts every character at the needed position and joins them together into blob.
+        The bodies are cached by position, so a sprite moving back to a position reuses the old string.
         Delete writes with whitespace and changes text color to background color and puts blue background back.
 
     """
@@ -25,45 +96,46 @@ class Player(Drawable):
         self.y = y
         self.terminal = terminal
 
-    def create_body(self):  # Creates the body of the player. Puts all the characters toghether in parts list
-        self.parts = []
-        eye1 = self.terminal.move_xy(self.x + 1, self.y + 1) + self.terminal.white(self.terminal.on_blue('▘'))
-        self.parts.append(eye1)
-        eye2 = self.terminal.move_xy(self.x + 2, self.y + 1) + self.terminal.white(self.terminal.on_blue('▝'))
-        self.parts.append(eye2)
-        left = self.terminal.move_xy(self.x, self.y + 1) + self.terminal.blue(self.terminal.on_blue(' '))
-        self.parts.append(left)
-        right = self.terminal.move_xy(self.x + 3, self.y + 1) + self.terminal.blue(self.terminal.on_blue(' '))
-        self.parts.append(right)
-        up1 = self.terminal.move_xy(self.x, self.y) + self.terminal.blue(self.terminal.on_midnightblue('▟'))
-        self.parts.append(up1)
-        up2 = self.terminal.move_xy(self.x + 1, self.y) + self.terminal.blue(self.terminal.on_blue(' '))
-        self.parts.append(up2)
-        up3 = self.terminal.move_xy(self.x + 2, self.y) + self.terminal.blue(self.terminal.on_blue(' '))
-        self.parts.append(up3)
-        up4 = self.terminal.move_xy(self.x + 3, self.y) + self.terminal.blue(self.terminal.on_midnightblue('▙'))
-        self.parts.append(up4)
-        leg1 = self.terminal.move_xy(self.x, self.y + 2) + self.terminal.blue(self.terminal.on_midnightblue('▞'))
-        self.parts.append(leg1)
-        leg4 = self.terminal.move_xy(self.x + 3, self.y + 2) + self.terminal.blue(self.terminal.on_midnightblue('▚'))
-        self.parts.append(leg4)
-        leg2 = self.terminal.move_xy(self.x + 1, self.y + 2) + self.terminal.blue(self.terminal.on_midnightblue('▍'))
-        self.parts.append(leg2)
-        leg3 = self.terminal.move_xy(self.x + 2, self.y + 2) + self.terminal.blue(self.terminal.on_midnightblue('▍'))
-        self.parts.append(leg3)
+    def create_body(self):  # Creates the body of the player. Puts all the characters toghether in blob
+        self.blob = _player_body(self.terminal, self.x, self.y)
 
     def draw(self):
         self.create_body()
         return super().draw()
     
     def draw_inside_box(self):
+        palette = _palette(self.terminal)
         string = ""
-        eye1 = self.terminal.move_xy(self.x + 1, self.y + 1) + self.terminal.white(self.terminal.on_gray15('▘'))
+        eye1 = self.terminal.move_xy(self.x + 1, self.y + 1) + palette.player_eye_left_inside
         string += eye1
-        eye2 = self.terminal.move_xy(self.x + 2, self.y + 1) + self.terminal.white(self.terminal.on_gray15('▝'))
+        eye2 = self.terminal.move_xy(self.x + 2, self.y + 1) + palette.player_eye_right_inside
         string += eye2
         print(string, flush=True)
 
+
+@lru_cache(maxsize=None)
+def _box_body(terminal, x, y):  # Builds the body of a box at (x, y)
+    palette = _palette(terminal)
+    parts = []
+    up1 = terminal.move_xy(x, y) + palette.box_top_left
+    parts.append(up1)
+    up2 = terminal.move_xy(x + 1, y) + palette.box_top
+    parts.append(up2)
+    up3 = terminal.move_xy(x + 2, y) + palette.box_top
+    parts.append(up3)
+    up4 = terminal.move_xy(x + 3, y) + palette.box_top_right
+    parts.append(up4)
+    up1 = terminal.move_xy(x, y + 1) + palette.box_bottom_left
+    parts.append(up1)
+    up2 = terminal.move_xy(x + 1, y + 1) + palette.box_bottom
+    parts.append(up2)
+    up3 = terminal.move_xy(x + 2, y + 1) + palette.box_bottom
+    parts.append(up3)
+    up4 = terminal.move_xy(x + 3, y + 1) + palette.box_bottom_right
+    parts.append(up4)
+    return ''.join(parts)
+
+
 class Box(Drawable):
     def __init__(self, x, y, terminal):
         super().__init__()
@@ -73,28 +145,36 @@ class Box(Drawable):
         self.create_body()
 
     def create_body(self):
-        self.parts = []
-        up1 = self.terminal.move_xy(self.x, self.y) + self.terminal.navajowhite4(self.terminal.on_navajowhite3('▛'))
-        self.parts.append(up1)
-        up2 = self.terminal.move_xy(self.x + 1, self.y) + self.terminal.navajowhite4(self.terminal.on_navajowhite3('▔'))
-        self.parts.append(up2)
-        up3 = self.terminal.move_xy(self.x + 2, self.y) + self.terminal.navajowhite4(self.terminal.on_navajowhite3('▔'))
-        self.parts.append(up3)
-        up4 = self.terminal.move_xy(self.x + 3, self.y) + self.terminal.navajowhite4(self.terminal.on_navajowhite3('▜'))
-        self.parts.append(up4)
-        up1 = self.terminal.move_xy(self.x, self.y + 1) + self.terminal.navajowhite4(self.terminal.on_navajowhite3('▙'))
-        self.parts.append(up1)
-        up2 = self.terminal.move_xy(self.x + 1, self.y + 1) + self.terminal.navajowhite4(self.terminal.on_navajowhite3('▁'))
-        self.parts.append(up2)
-        up3 = self.terminal.move_xy(self.x + 2, self.y + 1) + self.terminal.navajowhite4(self.terminal.on_navajowhite3('▁'))
-        self.parts.append(up3)
-        up4 = self.terminal.move_xy(self.x + 3, self.y + 1) + self.terminal.navajowhite4(self.terminal.on_navajowhite3('▟'))
-        self.parts.append(up4)
+        self.blob = _box_body(self.terminal, self.x, self.y)
 
     def draw(self):
         self.create_body()
         return super().draw()
 
+
+@lru_cache(maxsize=None)
+def _target_body(terminal, x, y):  # Builds the body of a target at (x, y)
+    palette = _palette(terminal)
+    parts = []
+    up1 = terminal.move_xy(x, y) + palette.target_top_left
+    parts.append(up1)
+    up2 = terminal.move_xy(x + 1, y) + palette.target_top
+    parts.append(up2)
+    up3 = terminal.move_xy(x + 2, y) + palette.target_top
+    parts.append(up3)
+    up4 = terminal.move_xy(x + 3, y) + palette.target_top_right
+    parts.append(up4)
+    up1 = terminal.move_xy(x, y + 1) + palette.target_bottom_left
+    parts.append(up1)
+    up2 = terminal.move_xy(x + 1, y + 1) + palette.target_bottom
+    parts.append(up2)
+    up3 = terminal.move_xy(x + 2, y + 1) + palette.target_bottom
+    parts.append(up3)
+    up4 = terminal.move_xy(x + 3, y + 1) + palette.target_bottom_right
+    parts.append(up4)
+    return ''.join(parts)
+
+
 class Target(Drawable):
     def __init__(self, x, y, terminal):
         super().__init__()
@@ -104,23 +184,26 @@ class Target(Drawable):
         self.create_body()
 
     def create_body(self):
-        self.parts = []
-        up1 = self.terminal.move_xy(self.x, self.y) + self.terminal.gray38(self.terminal.on_midnightblue('▛'))
-        self.parts.append(up1)
-        up2 = self.terminal.move_xy(self.x + 1, self.y) + self.terminal.gray38(self.terminal.on_midnightblue('▔'))
-        self.parts.append(up2)
-        up3 = self.terminal.move_xy(self.x + 2, self.y) + self.terminal.gray38(self.terminal.on_midnightblue('▔'))
-        self.parts.append(up3)
-        up4 = self.terminal.move_xy(self.x + 3, self.y) + self.terminal.gray38(self.terminal.on_midnightblue('▜'))
-        self.parts.append(up4)
-        up1 = self.terminal.move_xy(self.x, self.y + 1) + self.terminal.gray38(self.terminal.on_midnightblue('▙'))
-        self.parts.append(up1)
-        up2 = self.terminal.move_xy(self.x + 1, self.y + 1) + self.terminal.gray38(self.terminal.on_midnightblue('▁'))
-        self.parts.append(up2)
-        up3 = self.terminal.move_xy(self.x + 2, self.y + 1) + self.terminal.gray38(self.terminal.on_midnightblue('▁'))
-        self.parts.append(up3)
-        up4 = self.terminal.move_xy(self.x + 3, self.y + 1) + self.terminal.gray38(self.terminal.on_midnightblue('▟'))
-        self.parts.append(up4)
+        self.blob = _target_body(self.terminal, self.x, self.y)
+
+
+@lru_cache(maxsize=None)
+def _platform_body(terminal, x, y, lenght, flat):  # Builds the body of a platform at (x, y)
+    palette = _palette(terminal)
+    parts = []
+    if flat:  # checks if the platform is horizontal or not and builds it based on that
+        up1 = terminal.move_xy(x, y) + palette.platform_left
+        parts.append(up1)
+        for i in range(1, lenght - 1):
+            up2 = terminal.move_xy(x + i, y) + palette.platform_middle
+            parts.append(up2)
+        up3 = terminal.move_xy(x + lenght - 1, y) + palette.platform_right
+        parts.append(up3)
+    else:
+        for i in range(0, lenght):
+            up = terminal.move_xy(x, y + i) + palette.platform_vertical
+            parts.append(up)
+    return ''.join(parts)
 
 
 class Platform(Drawable):
@@ -134,18 +217,35 @@ class Platform(Drawable):
         self.create_body()
 
     def create_body(self):
-        if self.flat:  # checks if the platform is horizontal or not and builds it based on that
-            up1 = self.terminal.move_xy(self.x, self.y) + self.terminal.orchid4(self.terminal.on_plum4('▛'))
-            self.parts.append(up1)
-            for i in range(1, self.lenght - 1):
-                up2 = self.terminal.move_xy(self.x + i, self.y) + self.terminal.orchid4(self.terminal.on_plum4('▔'))
-                self.parts.append(up2)
-            up3 = self.terminal.move_xy(self.x + self.lenght - 1, self.y) + self.terminal.orchid4(self.terminal.on_plum4('▜'))
-            self.parts.append(up3)
-        else:
-            for i in range(0, self.lenght):
-                up = self.terminal.move_xy(self.x, self.y + i) + self.terminal.orchid4(self.terminal.on_plum4('▚'))
-                self.parts.append(up)
+        self.blob = _platform_body(self.terminal, self.x, self.y, self.lenght, self.flat)
+
+
+@lru_cache(maxsize=None)
+def _thinkingbox_body(terminal, x, y):  # Builds the body of the thinking box at (x, y)
+    palette = _palette(terminal)
+    parts = []
+    up1 = terminal.move_xy(x, y) + palette.thinkingbox_top_left
+    parts.append(up1)
+    for i in range(1, 7):
+        up2 = terminal.move_xy(x + i, y) + palette.thinkingbox_top
+        parts.append(up2)
+    up3 = terminal.move_xy(x + 7, y) + palette.thinkingbox_top_right
+    parts.append(up3)
+    middle1 = terminal.move_xy(x, y + 1) + palette.thinkingbox_left
+    parts.append(middle1)
+    for i in range(1, 7):
+        middle2 = terminal.move_xy(x + i, y + 1) + palette.thinkingbox_inside
+        parts.append(middle2)
+    middle3 = terminal.move_xy(x + 7, y + 1) + palette.thinkingbox_right
+    parts.append(middle3)
+    down1 = terminal.move_xy(x, y + 2) + palette.thinkingbox_left
+    parts.append(down1)
+    for i in range(1, 7):
+        down2 = terminal.move_xy(x + i, y + 2) + palette.thinkingbox_inside
+        parts.append(down2)
+    down3 = terminal.move_xy(x + 7, y + 2) + palette.thinkingbox_right
+    parts.append(down3)
+    return ''.join(parts)
 
 
 class ThinkingBox(Drawable):
@@ -157,30 +257,7 @@ class ThinkingBox(Drawable):
         self.create_body()
 
     def create_body(self):
-        up1 = self.terminal.move_xy(self.x, self.y) + self.terminal.gray37(self.terminal.on_gray15('▛'))
-        self.parts.append(up1)
-        for i in range(1, 7):
-            up2 = self.terminal.move_xy(self.x + i, self.y) + self.terminal.gray37(self.terminal.on_gray15('▔'))
-            self.parts.append(up2)
-        up3 = self.terminal.move_xy(self.x + 7, self.y) + self.terminal.gray37(self.terminal.on_gray15('▜'))
-        self.parts.append(up3)
-        middle1 = self.terminal.move_xy(self.x, self.y + 1) + self.terminal.gray37(self.terminal.on_gray15('▏'))
-        self.parts.append(middle1)
-        for i in range(1, 7):
-            middle2 = self.terminal.move_xy(self.x + i, self.y + 1) + self.terminal.gray37(self.terminal.on_gray15(' '))
-            self.parts.append(middle2)
-        middle3 = self.terminal.move_xy(self.x + 7, self.y + 1) + self.terminal.gray37(self.terminal.on_gray15('▕'))
-        self.parts.append(middle3)
-        down1 = self.terminal.move_xy(self.x, self.y + 2) + self.terminal.gray37(self.terminal.on_gray15('▏'))
-        self.parts.append(down1)
-        for i in range(1, 7):
-            down2 = self.terminal.move_xy(self.x + i, self.y + 2) + self.terminal.gray37(self.terminal.on_gray15(' '))
-            self.parts.append(down2)
-        down3 = self.terminal.move_xy(self.x + 7, self.y + 2) + self.terminal.gray37(self.terminal.on_gray15('▕'))
-        self.parts.append(down3)
+        self.blob = _thinkingbox_body(self.terminal, self.x, self.y)
     
     def draw_inside_box(self):
-        string = ""
-        for i in self.parts:
-            string += i
-        print(string, flush=True)
+        print(self.blob, flush=True)